@@ -2,12 +2,15 @@ import hashlib
 import hmac
 import sys
 import time
-import json
-from copy import copy
+from bisect import bisect_left, insort
 from datetime import datetime, timedelta
 from typing import Callable
 from zoneinfo import ZoneInfo
-from functools import partial
+from functools import lru_cache, partial
+from types import MappingProxyType
+from urllib.parse import urlencode
+
+import orjson
 
 from vnpy_evo.event import EventEngine, Event
 from vnpy_evo.trader.event import EVENT_TIMER
@@ -53,72 +56,96 @@ REAL_OPTION_WEBSOCKET_HOST: str = "wss://stream.bybit.com/v5/public/option"
 # Demo server hosts
 DEMO_REST_HOST: str = "https://api-demo.bybit.com"
 DEMO_PRIVATE_WEBSOCKET_HOST: str = "wss://stream-demo.bybit.com/v5/private"
-DEMO_SPOT_WEBSOCKET_HOST: str = "wss://stream-demo.bybit.com/v5/public/spot"
-DEMO_LINEAR_WEBSOCKET_HOST: str = "wss://stream-demo.bybit.com/v5/public/linear"
-DEMO_INVERSE_WEBSOCKET_HOST: str = "wss://stream-demo.bybit.com/v5/public/inverse"
-DEMO_OPTION_WEBSOCKET_HOST: str = "wss://stream-demo.bybit.com/v5/public/option"
+
+# Public websocket host map, demo trading shares market data with real server
+PUBLIC_WEBSOCKET_HOSTS: MappingProxyType[str, str] = MappingProxyType({
+    "spot": REAL_SPOT_WEBSOCKET_HOST,
+    "linear": REAL_LINEAR_WEBSOCKET_HOST,
+    "inverse": REAL_INVERSE_WEBSOCKET_HOST,
+    "option": REAL_OPTION_WEBSOCKET_HOST,
+})
 
 # Product type map
-PRODUCT_BYBIT2VT: dict[str, Exchange] = {
+PRODUCT_BYBIT2VT: MappingProxyType[str, Product] = MappingProxyType({
     "spot": Product.SPOT,
     "linear": Product.SWAP,
     "inverse": Product.SWAP,
     "option": Product.OPTION,
-}
+})
 
 # Option type map
-OPTION_TYPE_BYBIT2VT: dict[str, OptionType] = {
+OPTION_TYPE_BYBIT2VT: MappingProxyType[str, OptionType] = MappingProxyType({
     "Call": OptionType.CALL,
     "Put": OptionType.PUT
-}
+})
 
 # Order status map
-STATUS_BYBIT2VT: dict[str, Status] = {
+STATUS_BYBIT2VT: MappingProxyType[str, Status] = MappingProxyType({
     "Created": Status.NOTTRADED,
     "New": Status.NOTTRADED,
     "PartiallyFilled": Status.PARTTRADED,
     "Filled": Status.ALLTRADED,
     "Cancelled": Status.CANCELLED,
     "Rejected": Status.REJECTED,
-}
+})
 
 # Order type map
-ORDER_TYPE_VT2BYBIT: dict[OrderType, str] = {
+ORDER_TYPE_VT2BYBIT: MappingProxyType[OrderType, str] = MappingProxyType({
     OrderType.LIMIT: "Limit",
     OrderType.MARKET: "Market",
-}
-ORDER_TYPE_BYBIT2VT: dict[str, OrderType] = {v: k for k, v in ORDER_TYPE_VT2BYBIT.items()}
+})
+ORDER_TYPE_BYBIT2VT: MappingProxyType[str, OrderType] = MappingProxyType({v: k for k, v in ORDER_TYPE_VT2BYBIT.items()})
 
 # Direction map
-DIRECTION_VT2BYBIT: dict[Direction, str] = {
+DIRECTION_VT2BYBIT: MappingProxyType[Direction, str] = MappingProxyType({
     Direction.LONG: "Buy",
     Direction.SHORT: "Sell"
-}
-DIRECTION_BYBIT2VT: dict[str, Direction] = {v: k for k, v in DIRECTION_VT2BYBIT.items()}
+})
+DIRECTION_BYBIT2VT: MappingProxyType[str, Direction] = MappingProxyType({v: k for k, v in DIRECTION_VT2BYBIT.items()})
+
+# Position side sign map, empty side means no position
+SIDE_SIGN_BYBIT: MappingProxyType[str, int] = MappingProxyType({
+    "Buy": 1,
+    "Sell": -1,
+})
+
+# Offset map indexed by reduceOnly flag
+OFFSET_BYBIT2VT: tuple[Offset, Offset] = (Offset.OPEN, Offset.CLOSE)
 
 # Interval map
-INTERVAL_VT2BYBIT: dict[Interval, str] = {
+INTERVAL_VT2BYBIT: MappingProxyType[Interval, str] = MappingProxyType({
     Interval.MINUTE: "1",
     Interval.HOUR: "60",
     Interval.DAILY: "D",
     Interval.WEEKLY: "W",
-}
-TIMEDELTA_MAP: dict[Interval, timedelta] = {
+})
+TIMEDELTA_MAP: MappingProxyType[Interval, timedelta] = MappingProxyType({
     Interval.MINUTE: timedelta(minutes=1),
     Interval.HOUR: timedelta(hours=1),
     Interval.DAILY: timedelta(days=1),
     Interval.WEEKLY: timedelta(days=7),
-}
+})
 
 # Tick field map
-TICK_FIELD_BYBIT2VT: dict[str, str] = {
+TICK_FIELD_BYBIT2VT: MappingProxyType[str, str] = MappingProxyType({
     "lastPrice": "last_price",
     "highPrice24h": "high_price",
     "lowPrice24h": "low_price",
     "volume24h": "volume",
     "turnover24h": "turnover",
     "openInterest": "open_interest",
-}
+})
+TICK_FIELD_ITEMS: tuple[tuple[str, str], ...] = tuple(TICK_FIELD_BYBIT2VT.items())
+
+# Payload parameters requiring specific value type
+STRING_PARAMS: frozenset[str] = frozenset({
+    "qty",
+    "price",
+    "triggerPrice",
+    "takeProfit",
+    "stopLoss",
+})
+INTEGER_PARAMS: frozenset[str] = frozenset({"positionIdx"})
 
 
 # Global data storage
@@ -251,9 +278,17 @@ class BybitRestApi(RestClient):
 
         self.key: str = ""
         self.secret: str = ""
+        self.hmac_template: hmac.HMAC = None
+        self.recv_window: int = 30_000
+        self.key_recv_window: str = ""
+        self.base_headers: dict[str, str] = {}
 
         self.time_offset: int = 0
         self.order_count: int = 0
+        self.orderid_second: int = 0
+        self.orderid_prefix: str = ""
+
+        self.contract_pending: int = 0
 
     def sign(self, request: Request) -> Request:
         """Standard callback for signing a request"""
@@ -267,21 +302,19 @@ class BybitRestApi(RestClient):
         req_params: str = prepare_payload(request.method, parameters)
 
         # Generate signature
-        timestamp: int = int(time.time() * 1000) - self.time_offset
-        recv_window: int = 30_000
+        timestamp: str = str(time.time_ns() // 1_000_000 - self.time_offset)
+
+        param_str: str = timestamp + self.key_recv_window + req_params
 
-        param_str: str = str(timestamp) + self.key + str(recv_window) + req_params
-        signature: str = generate_signature(self.secret, param_str)
+        mac: hmac.HMAC = self.hmac_template.copy()
+        mac.update(param_str.encode("utf-8"))
+        signature: str = mac.hexdigest()
 
         # Add headers
-        request.headers = {
-            "Content-Type": "application/json",
-            "X-BAPI-API-KEY": self.key,
-            "X-BAPI-SIGN": signature,
-            "X-BAPI-SIGN-TYPE": "2",
-            "X-BAPI-TIMESTAMP": str(timestamp),
-            "X-BAPI-RECV-WINDOW": str(recv_window),
-        }
+        headers: dict[str, str] = self.base_headers.copy()
+        headers["X-BAPI-SIGN"] = signature
+        headers["X-BAPI-TIMESTAMP"] = timestamp
+        request.headers = headers
 
         if request.method != "GET":
             request.data = req_params
@@ -290,24 +323,26 @@ class BybitRestApi(RestClient):
 
     def new_orderid(self) -> str:
         """Generate local order id"""
-        prefix: str = datetime.now().strftime("%Y%m%d-%H%M%S-")
+        # Only rebuild the datetime prefix when the second changes
+        second: int = int(time.time())
+        if second != self.orderid_second:
+            self.orderid_second = second
+            self.orderid_prefix = time.strftime("%Y%m%d-%H%M%S-", time.localtime(second))
 
         self.order_count += 1
-        suffix: str = str(self.order_count).rjust(8, "0")
 
-        orderid: str = prefix + suffix
+        orderid: str = f"{self.orderid_prefix}{self.order_count:08d}"
         return orderid
 
     def check_error(self, name: str, data: dict) -> bool:
-        """回报状态检查"""
-        if data["ret_code"]:
-            error_code: int = data["ret_code"]
-            error_msg: str = data["ret_msg"]
-            msg = f"{name}失败，错误代码：{error_code}，信息：{error_msg}"
-            self.gateway.write_log(msg)
-            return True
+        """Check return code of response data and log error"""
+        error_code: int = data["retCode"]
+        if not error_code:
+            return False
 
-        return False
+        msg = f"{name} failed, code: {error_code}, message: {data['retMsg']}"
+        self.gateway.write_log(msg)
+        return True
 
     def connect(
         self,
@@ -321,6 +356,19 @@ class BybitRestApi(RestClient):
         self.key = key
         self.secret = secret
 
+        # Keyed HMAC state is reused for every request signature
+        self.hmac_template = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+        # Parts not changing between requests
+        self.key_recv_window = key + str(self.recv_window)
+
+        self.base_headers = {
+            "Content-Type": "application/json",
+            "X-BAPI-API-KEY": key,
+            "X-BAPI-SIGN-TYPE": "2",
+            "X-BAPI-RECV-WINDOW": str(self.recv_window),
+        }
+
         if server == "REAL":
             self.init(REAL_REST_HOST, proxy_host, proxy_port)
         else:
@@ -341,7 +389,10 @@ class BybitRestApi(RestClient):
 
     def query_contract(self) -> None:
         """Query available contract"""
-        for category in ["spot", "linear", "inverse", "option"]:
+        categories: list[str] = ["spot", "linear", "inverse", "option"]
+        self.contract_pending = len(categories)
+
+        for category in categories:
             params: dict = {
                 "category": category,
                 "limit": 1000
@@ -351,7 +402,9 @@ class BybitRestApi(RestClient):
                 "GET",
                 "/v5/market/instruments-info",
                 self.on_query_contract,
-                params=params
+                params=params,
+                on_failed=self.on_query_contract_failed,
+                on_error=self.on_query_contract_error
             )
 
     def query_order(self) -> None:
@@ -459,13 +512,12 @@ class BybitRestApi(RestClient):
             "symbol": req.symbol
         }
 
-        # Use dash count to check order id type
-        dash_count = req.orderid.count("-")
-
-        if dash_count == 4:
-            data["orderId"] = req.orderid
+        # Exchange order id is UUID or numeric string, anything else is orderLinkId
+        orderid: str = req.orderid
+        if orderid.count("-") == 4 or orderid.isdigit():
+            data["orderId"] = orderid
         else:
-            data["orderLinkId"] = req.orderid
+            data["orderLinkId"] = orderid
 
         # Send cancel request
         self.add_request(
@@ -481,15 +533,22 @@ class BybitRestApi(RestClient):
         start_time: int = int(req.start.timestamp()) * 1000
         category: str = symbol_category_map.get(req.symbol, "")
 
+        interval: str = INTERVAL_VT2BYBIT[req.interval]
+        interval_ms: int = int(TIMEDELTA_MAP[req.interval].total_seconds()) * 1000
+
+        if req.end:
+            end_time: int = int(req.end.timestamp()) * 1000
+        else:
+            end_time: int = int(time.time()) * 1000
+
         buf: dict[datetime, BarData] = {}
-        last_end_dt: datetime = None
 
         while True:
             # Create query params
             params: dict = {
                 "category": category,
                 "symbol": req.symbol,
-                "interval": INTERVAL_VT2BYBIT[req.interval],
+                "interval": interval,
                 "start": start_time,
                 "limit": count
             }
@@ -507,7 +566,7 @@ class BybitRestApi(RestClient):
                 self.gateway.write_log(msg)
                 break
             else:
-                packet: dict = resp.json()
+                packet: dict = orjson.loads(resp.content)
                 result: dict = packet["result"]
                 kline_data: list = result["list"]
 
@@ -518,41 +577,37 @@ class BybitRestApi(RestClient):
 
                 for row in kline_data:
                     dt: datetime = generate_datetime(int(row[0]))
+                    open_price, high_price, low_price, close_price, volume, turnover = map(float, row[1:7])
 
-                    bar: BarData = BarData(
+                    buf[dt] = BarData(
                         symbol=req.symbol,
                         exchange=req.exchange,
                         datetime=dt,
                         interval=req.interval,
-                        volume=float(row[5]),
-                        turnover=float(row[6]),
-                        open_price=float(row[1]),
-                        high_price=float(row[2]),
-                        low_price=float(row[3]),
-                        close_price=float(row[4]),
+                        volume=volume,
+                        turnover=turnover,
+                        open_price=open_price,
+                        high_price=high_price,
+                        low_price=low_price,
+                        close_price=close_price,
                         gateway_name=self.gateway_name
                     )
-                    buf[bar.datetime] = bar
 
                 begin: str = kline_data[-1][0]
                 begin_dt = generate_datetime(int(begin))
 
-                end: datetime = kline_data[0][0]
-                end_dt = generate_datetime(int(end))
+                end: int = int(kline_data[0][0])
+                end_dt = generate_datetime(end)
 
                 msg: str = f"Query kline history finished, {req.symbol} - {req.interval.value}, {begin_dt} - {end_dt}"
                 self.gateway.write_log(msg)
 
+                # Update start time to the bar after the latest received
+                start_time = end + interval_ms
+
                 # Break loop if all data received
-                if (
-                    (req.end and end_dt >= req.end)
-                    or end_dt == last_end_dt
-                ):
+                if len(kline_data) < count or start_time > end_time:
                     break
-                last_end_dt = end_dt
-
-                # Update start time
-                start_time: int = end
 
                 # Sleep 0.01s to avoid rate limit
                 time.sleep(0.01)
@@ -566,8 +621,8 @@ class BybitRestApi(RestClient):
     def on_failed(self, status_code: int, request: Request) -> None:
         """General failed callback"""
         data: dict = request.response.json()
-        error_msg: str = data["ret_msg"]
-        error_code: int = data["ret_code"]
+        error_msg: str = data["retMsg"]
+        error_code: int = data["retCode"]
 
         msg = f"Request failed, status code：{request.status}, error code: {error_code}, message: {error_msg}"
         self.gateway.write_log(msg)
@@ -589,19 +644,20 @@ class BybitRestApi(RestClient):
         """Callback of server time query"""
         result: dict = packet["result"]
 
-        local_time: float = int(time.time() * 1000)
+        local_time: int = time.time_ns() // 1_000_000
         server_time: float = int(int(result["timeNano"]) / 1_000_000)
         self.time_offset = local_time - server_time
 
         self.gateway.write_log(f"Server time updated, local offset: {self.time_offset} ms")
 
         self.query_contract()
-        self.query_order()
-        self.query_account()
-        self.query_position()
 
     def on_query_contract(self, data: dict, request: Request) -> None:
         """Callback of available contracts query"""
+        if self.check_error("Query contract", data):
+            self.on_query_contract_finished()
+            return
+
         result: dict = data["result"]
 
         category: str = result["category"]
@@ -643,58 +699,74 @@ class BybitRestApi(RestClient):
 
         self.gateway.write_log(f"Available {category} contracts data is received")
 
+        self.on_query_contract_finished()
+
+    def on_query_contract_failed(self, status_code: int, request: Request) -> None:
+        """Failed callback of available contracts query"""
+        self.on_failed(status_code, request)
+        self.on_query_contract_finished()
+
+    def on_query_contract_error(
+        self,
+        exception_type: type,
+        exception_value: Exception,
+        tb,
+        request: Request
+    ) -> None:
+        """Error callback of available contracts query"""
+        self.on_error(exception_type, exception_value, tb, request)
+        self.on_query_contract_finished()
+
+    def on_query_contract_finished(self) -> None:
+        """Query user data after contracts query of all categories finished"""
+        self.contract_pending -= 1
+        if not self.contract_pending:
+            self.query_order()
+            self.query_account()
+            self.query_position()
+
     def on_query_order(self, data: dict, request: Request):
         """Callback of open orders query"""
-        if data["retCode"]:
-            msg = f"Query open orders failed, code: {data['retCode']}, message: {data['retMsg']}"
-            self.gateway.write_log(msg)
+        if self.check_error("Query open orders", data):
             return
 
         result: dict = data["result"]
         category: str = result["category"]
 
+        type_map: MappingProxyType[str, OrderType] = ORDER_TYPE_BYBIT2VT
+        direction_map: MappingProxyType[str, Direction] = DIRECTION_BYBIT2VT
+        status_map: MappingProxyType[str, Status] = STATUS_BYBIT2VT
+
         for d in result["list"]:
             order: OrderData = OrderData(
                 symbol=d["symbol"],
                 exchange=Exchange.BYBIT,
-                orderid=d["orderLinkId"],
-                type=ORDER_TYPE_BYBIT2VT[d["orderType"]],
-                direction=DIRECTION_BYBIT2VT[d["side"]],
+                orderid=d["orderLinkId"] or d["orderId"],
+                type=type_map[d["orderType"]],
+                direction=direction_map[d["side"]],
                 price=float(d["price"]),
                 volume=float(d["qty"]),
                 traded=float(d["cumExecQty"]),
-                status=STATUS_BYBIT2VT[d["orderStatus"]],
+                status=status_map[d["orderStatus"]],
+                offset=OFFSET_BYBIT2VT[d["reduceOnly"]],
                 datetime=generate_datetime(int(d["createdTime"])),
                 gateway_name=self.gateway_name
             )
 
-            offset: bool = d["reduceOnly"]
-            if offset:
-                order.offset = Offset.CLOSE
-            else:
-                order.offset = Offset.OPEN
-
             self.gateway.on_order(order)
 
         self.gateway.write_log(f"{category} open orders data is received")
 
     def on_query_account(self, data: dict, request: Request) -> None:
         """Callback of account balance query"""
-        if data["retCode"]:
-            msg = f"Query account balance failed, code: {data['retCode']}, message: {data['retMsg']}"
-            self.gateway.write_log(msg)
+        if self.check_error("Query account balance", data):
             return
 
         result: dict = data["result"]
 
         for d in result["list"]:
-            balance: float = 0
-            if d["totalWalletBalance"]:
-                balance = float(d["totalWalletBalance"])
-
-            available: float = 0
-            if d["totalAvailableBalance"]:
-                available = float(d["totalAvailableBalance"])
+            balance: float = get_float_value(d, "totalWalletBalance")
+            available: float = get_float_value(d, "totalAvailableBalance")
 
             account: AccountData = AccountData(
                 accountid=d["accountType"],
@@ -706,19 +778,13 @@ class BybitRestApi(RestClient):
 
     def on_query_position(self, data: dict, request: Request) -> None:
         """Callback of holding positions query"""
-        if data["retCode"]:
-            msg = f"Query holding position failed, code: {data['retCode']}, message: {data['retMsg']}"
-            self.gateway.write_log(msg)
+        if self.check_error("Query holding position", data):
             return
 
         result: dict = data["result"]
 
         for d in result["list"]:
-            volume: float = 0
-            if d["side"] == "Buy":
-                volume = float(d["size"])
-            elif d["side"] == "Sell":
-                volume = -float(d["size"])
+            volume: float = SIDE_SIGN_BYBIT.get(d["side"], 0) * float(d["size"])
 
             position: PositionData = PositionData(
                 symbol=d["symbol"],
@@ -733,8 +799,9 @@ class BybitRestApi(RestClient):
     def on_send_order_failed(self, status_code: int, request: Request) -> None:
         """Failed callback of send_order"""
         order: OrderData = request.extra
-        order.status = Status.REJECTED
-        self.gateway.on_order(order)
+        if order.status != Status.REJECTED:
+            order.status = Status.REJECTED
+            self.gateway.on_order(order)
 
         msg = f"Send order failed, code: {status_code}"
         self.gateway.write_log(msg)
@@ -742,8 +809,9 @@ class BybitRestApi(RestClient):
     def on_send_order_error(self, exception_type: type, exception_value: Exception, tb, request: Request) -> None:
         """Error callback of send_order"""
         order: OrderData = request.extra
-        order.status = Status.REJECTED
-        self.gateway.on_order(order)
+        if order.status != Status.REJECTED:
+            order.status = Status.REJECTED
+            self.gateway.on_order(order)
 
         msg: str = f"Send order error, exception type: {exception_type}, exception value: {exception_value}"
         self.gateway.write_log(msg)
@@ -752,19 +820,15 @@ class BybitRestApi(RestClient):
 
     def on_send_order(self, data: dict, request: Request) -> None:
         """Successful callback of send order"""
-        if data["retCode"]:
-            msg = f"Send order failed, code: {data['retCode']}, message: {data['retMsg']}"
-            self.gateway.write_log(msg)
-
+        if self.check_error("Send order", data):
             order: OrderData = request.extra
-            order.status = Status.REJECTED
-            self.gateway.on_order(order)
+            if order.status != Status.REJECTED:
+                order.status = Status.REJECTED
+                self.gateway.on_order(order)
 
     def on_cancel_order(self, data: dict, request: Request) -> None:
         """Successful callback of cancel order"""
-        if data["retCode"]:
-            msg = f"Cancel order failed, code: {data['retCode']}, message: {data['retMsg']}"
-            self.gateway.write_log(msg)
+        self.check_error("Cancel order", data)
 
 
 class BybitPublicWebsocketApi:
@@ -784,6 +848,12 @@ class BybitPublicWebsocketApi:
         self.clients: dict[str, WebsocketClient] = {}
         self.ticks: dict[str, TickData] = {}
         self.subscribed: dict[str, SubscribeRequest] = {}
+        self.topics: dict[str, tuple[str, str]] = {}
+
+        self.symbol_bids: dict[str, dict[float, float]] = {}
+        self.symbol_asks: dict[str, dict[float, float]] = {}
+        self.symbol_bid_prices: dict[str, list[float]] = {}
+        self.symbol_ask_prices: dict[str, list[float]] = {}
 
         self.callbacks: dict[str, Callable] = {
             "ping": self.on_heartbeat,
@@ -797,7 +867,6 @@ class BybitPublicWebsocketApi:
         proxy_port: int
     ) -> None:
         """Start server connection"""
-        self.server = server
         self.proxy_host = proxy_host
         self.proxy_port = proxy_port
 
@@ -818,35 +887,13 @@ class BybitPublicWebsocketApi:
 
         client.is_connected = False
 
-        client.on_connected = partial(self.on_connected, category=category)
-        client.on_disconnected = partial(self.on_disconnected, category=category)
-        client.on_packet = partial(self.on_packet, category=category)
-        client.on_error = partial(self.on_error, category=category)
+        client.on_connected = partial(self.on_connected, category)
+        client.on_disconnected = partial(self.on_disconnected, category)
+        client.on_packet = partial(self.on_packet, category)
+        client.on_error = partial(self.on_error, category)
+        client.unpack_data = orjson.loads
 
-        # Get host
-        if self.server == "REAL":
-            category_host_map: dict = {
-                "spot": REAL_SPOT_WEBSOCKET_HOST,
-                "linear": REAL_LINEAR_WEBSOCKET_HOST,
-                "inverse": REAL_INVERSE_WEBSOCKET_HOST,
-                "option": REAL_OPTION_WEBSOCKET_HOST,
-            }
-        else:
-            category_host_map: dict = {
-                "spot": DEMO_SPOT_WEBSOCKET_HOST,
-                "linear": DEMO_LINEAR_WEBSOCKET_HOST,
-                "inverse": DEMO_INVERSE_WEBSOCKET_HOST,
-                "option": DEMO_OPTION_WEBSOCKET_HOST,
-            }
-
-        category_host_map: dict = {
-            "spot": REAL_SPOT_WEBSOCKET_HOST,
-            "linear": REAL_LINEAR_WEBSOCKET_HOST,
-            "inverse": REAL_INVERSE_WEBSOCKET_HOST,
-            "option": REAL_OPTION_WEBSOCKET_HOST,
-        }
-
-        host: str = category_host_map[category]
+        host: str = PUBLIC_WEBSOCKET_HOSTS[category]
 
         # Start conection
         client.init(host, self.proxy_host, self.proxy_port)
@@ -872,6 +919,12 @@ class BybitPublicWebsocketApi:
         )
         self.ticks[req.symbol] = tick
 
+        # Create local order book
+        self.symbol_bids[req.symbol] = {}
+        self.symbol_asks[req.symbol] = {}
+        self.symbol_bid_prices[req.symbol] = []
+        self.symbol_ask_prices[req.symbol] = []
+
         # Get websocket client
         category: str = symbol_category_map.get(req.symbol, "")
         if not category:
@@ -880,26 +933,38 @@ class BybitPublicWebsocketApi:
 
         # Send subscribe request
         if client.is_connected:
-            if category == "option":
-                depth: int = 100
-            else:
-                depth: int = 200
+            ticker_topic, depth_topic = self.get_topics(req.symbol, category)
+            self.subscribe_topics(client, {
+                ticker_topic: partial(self.on_ticker, req.symbol),
+                depth_topic: partial(self.on_depth, req.symbol),
+            })
+
+    def get_topics(self, symbol: str, category: str) -> tuple[str, str]:
+        """Get ticker and depth topics of symbol, generated once and cached"""
+        topics: tuple[str, str] = self.topics.get(symbol, None)
+        if topics:
+            return topics
+
+        if category == "option":
+            depth: int = 25
+        else:
+            depth: int = 50
 
-            self.subscribe_topic(client, f"tickers.{req.symbol}", self.on_ticker)
-            self.subscribe_topic(client, f"orderbook.{depth}.{req.symbol}", self.on_depth)
+        topics = (f"tickers.{symbol}", f"orderbook.{depth}.{symbol}")
+        self.topics[symbol] = topics
+        return topics
 
-    def subscribe_topic(
+    def subscribe_topics(
         self,
         client: WebsocketClient,
-        topic: str,
-        callback: Callable[[str, dict], object]
+        topic_callbacks: dict[str, Callable[[dict], object]]
     ) -> None:
-        """Subscribe topic of public stream"""
-        self.callbacks[topic] = callback
+        """Subscribe multiple topics of public stream with one request"""
+        self.callbacks.update(topic_callbacks)
 
         req: dict = {
             "op": "subscribe",
-            "args": [topic],
+            "args": list(topic_callbacks),
         }
         client.send_packet(req)
 
@@ -918,17 +983,15 @@ class BybitPublicWebsocketApi:
         self.gateway.write_log(f"Public websocket stream of {category} is connected")
 
         # Send subscribe request
-        for req in self.subscribed.values():
-            if symbol_category_map.get(req.symbol, "") != category:
+        for symbol in self.subscribed:
+            if symbol_category_map.get(symbol, "") != category:
                 continue
 
-            if category == "option":
-                depth: int = 25
-            else:
-                depth: int = 50
-
-            self.subscribe_topic(client, f"tickers.{req.symbol}", self.on_ticker)
-            self.subscribe_topic(client, f"orderbook.{depth}.{req.symbol}", self.on_depth)
+            ticker_topic, depth_topic = self.get_topics(symbol, category)
+            self.subscribe_topics(client, {
+                ticker_topic: partial(self.on_ticker, symbol),
+                depth_topic: partial(self.on_depth, symbol),
+            })
 
     def on_disconnected(self, category: str, status_code: int, msg: str) -> None:
         """Callback when server is disconnected"""
@@ -937,7 +1000,7 @@ class BybitPublicWebsocketApi:
 
         self.gateway.write_log(f"Public websocket stream of {category} is disconnected")
 
-    def on_packet(self, packet: dict, category: str) -> None:
+    def on_packet(self, category: str, packet: dict) -> None:
         """Callback of data update"""
         if "topic" in packet:
             channel: str = packet["topic"]
@@ -950,53 +1013,72 @@ class BybitPublicWebsocketApi:
         if callback:
             callback(packet)
 
-    def on_error(self, e: Exception) -> None:
+    def on_error(self, category: str, e: Exception) -> None:
         """General error callback"""
-        msg: str = f"Exception catched by public websocket API: {e}"
+        msg: str = f"Exception catched by public websocket API of {category}: {e}"
         self.gateway.write_log(msg)
 
-    def on_ticker(self, packet: dict) -> None:
+    def on_ticker(self, symbol: str, packet: dict) -> None:
         """Callback of ticker update"""
-        topic: str = packet["topic"]
         data: dict = packet["data"]
-
-        symbol: str = topic.replace("tickers.", "")
         tick: TickData = self.ticks[symbol]
 
         tick.datetime = generate_datetime(packet["ts"])
 
-        data_fields: set[str] = set(data.keys())
-        tick_fields: set[str] = set(TICK_FIELD_BYBIT2VT.keys())
-        update_fields: set[str] = data_fields.intersection(tick_fields)
-
-        for field in update_fields:
-            value: float = float(data[field])
-            name: str = TICK_FIELD_BYBIT2VT[field]
-            setattr(tick, name, value)
+        # Delta updates only contain changed fields
+        for field, name in TICK_FIELD_ITEMS:
+            value: str = data.get(field)
+            if value:
+                setattr(tick, name, float(value))
 
-        self.gateway.on_tick(copy(tick))
+        self.gateway.on_tick(clone_tick(tick))
 
-    def on_depth(self, packet: dict) -> None:
+    def on_depth(self, symbol: str, packet: dict) -> None:
         """Callback of depth update"""
         data: dict = packet["data"]
-        symbol: str = data["s"]
         tick: TickData = self.ticks[symbol]
 
         tick.datetime = generate_datetime(packet["ts"])
 
-        bid_data: list = data["b"]
-        for i in range(min(5, len(bid_data))):
-            bp, bv = bid_data[i]
-            setattr(tick, f"bid_price_{i+1}", float(bp))
-            setattr(tick, f"bid_volume_{i+1}", float(bv))
+        bids: dict[float, float] = self.symbol_bids[symbol]
+        asks: dict[float, float] = self.symbol_asks[symbol]
+        bid_prices: list[float] = self.symbol_bid_prices[symbol]
+        ask_prices: list[float] = self.symbol_ask_prices[symbol]
 
-        ask_data: list = data["a"]
-        for i in range(min(5, len(ask_data))):
-            ap, av = ask_data[i]
-            setattr(tick, f"ask_price_{i+1}", float(ap))
-            setattr(tick, f"ask_volume_{i+1}", float(av))
+        # Reset local order book when snapshot received
+        if packet["type"] == "snapshot":
+            bids.clear()
+            asks.clear()
+            bid_prices.clear()
+            ask_prices.clear()
 
-        self.gateway.on_tick(copy(tick))
+        update_book(bids, bid_prices, data["b"])
+        update_book(asks, ask_prices, data["a"])
+
+        # Only the best 5 levels are required, pad empty levels with zero
+        bid_levels: list[tuple[float, float]] = [
+            (bp, bids[bp]) for bp in reversed(bid_prices[-5:])
+        ]
+        bid_levels.extend([(0, 0)] * (5 - len(bid_levels)))
+
+        ask_levels: list[tuple[float, float]] = [
+            (ap, asks[ap]) for ap in ask_prices[:5]
+        ]
+        ask_levels.extend([(0, 0)] * (5 - len(ask_levels)))
+
+        tick.bid_price_1, tick.bid_volume_1 = bid_levels[0]
+        tick.bid_price_2, tick.bid_volume_2 = bid_levels[1]
+        tick.bid_price_3, tick.bid_volume_3 = bid_levels[2]
+        tick.bid_price_4, tick.bid_volume_4 = bid_levels[3]
+        tick.bid_price_5, tick.bid_volume_5 = bid_levels[4]
+
+        tick.ask_price_1, tick.ask_volume_1 = ask_levels[0]
+        tick.ask_price_2, tick.ask_volume_2 = ask_levels[1]
+        tick.ask_price_3, tick.ask_volume_3 = ask_levels[2]
+        tick.ask_price_4, tick.ask_volume_4 = ask_levels[3]
+        tick.ask_price_5, tick.ask_volume_5 = ask_levels[4]
+
+        self.gateway.on_tick(clone_tick(tick))
 
     def on_heartbeat(self, packet: dict) -> None:
         """Callback of heartbeat pong"""
@@ -1055,10 +1137,7 @@ class BybitPrivateWebsocketApi(WebsocketClient):
         """User login"""
         expires: int = int((time.time() + 30) * 1000)
 
-        signature: str = str(hmac.new(
-            bytes(self.secret, "utf-8"),
-            bytes(f"GET/realtime{expires}", "utf-8"), digestmod="sha256"
-        ).hexdigest())
+        signature: str = generate_signature(self.secret, f"GET/realtime{expires}")
 
         req: dict = {
             "op": "auth",
@@ -1066,17 +1145,13 @@ class BybitPrivateWebsocketApi(WebsocketClient):
         }
         self.send_packet(req)
 
-    def subscribe_topic(
-        self,
-        topic: str,
-        callback: Callable[[str, dict], object]
-    ) -> None:
-        """Subscribe websocket stream topic"""
-        self.callbacks[topic] = callback
+    def subscribe_topics(self, topic_callbacks: dict[str, Callable[[dict], object]]) -> None:
+        """Subscribe multiple websocket stream topics with one request"""
+        self.callbacks.update(topic_callbacks)
 
         req: dict = {
             "op": "subscribe",
-            "args": [topic],
+            "args": list(topic_callbacks),
         }
         self.send_packet(req)
 
@@ -1110,6 +1185,10 @@ class BybitPrivateWebsocketApi(WebsocketClient):
         if callback:
             callback(packet)
 
+    def unpack_data(self, data: str) -> dict:
+        """Decode received text data"""
+        return orjson.loads(data)
+
     def on_error(self, e: Exception) -> None:
         """General error callback"""
         msg: str = f"Exception catched by private websocket API: {e}"
@@ -1121,33 +1200,40 @@ class BybitPrivateWebsocketApi(WebsocketClient):
         if success:
             self.gateway.write_log("Private websocket stream login successful")
 
-            self.subscribe_topic("order", self.on_order)
-            self.subscribe_topic("execution", self.on_trade)
-            self.subscribe_topic("position", self.on_position)
-            self.subscribe_topic("wallet", self.on_account)
+            self.subscribe_topics({
+                "order": self.on_order,
+                "execution": self.on_trade,
+                "position": self.on_position,
+                "wallet": self.on_account,
+            })
         else:
             self.gateway.write_log(f"Private websocket stream login failed: {packet['ret_msg']}")
 
     def on_account(self, packet: dict) -> None:
         """Callback of account balance update"""
         for d in packet["data"]:
-            account = AccountData(
+            balance: float = get_float_value(d, "totalWalletBalance")
+            available: float = get_float_value(d, "totalAvailableBalance")
+
+            account: AccountData = AccountData(
                 accountid=d["accountType"],
-                balance=float(d["totalWalletBalance"]),
-                frozen=(float(d["totalWalletBalance"]) - float(d["totalAvailableBalance"])),
+                balance=balance,
+                frozen=balance - available,
                 gateway_name=self.gateway_name,
             )
             self.gateway.on_account(account)
 
     def on_trade(self, packet: dict) -> None:
         """Callback of trade update"""
+        direction_map: MappingProxyType[str, Direction] = DIRECTION_BYBIT2VT
+
         for d in packet["data"]:
             trade: TradeData = TradeData(
                 symbol=d["symbol"],
                 exchange=Exchange.BYBIT,
-                orderid=d["orderLinkId"],
+                orderid=d["orderLinkId"] or d["orderId"],
                 tradeid=d["execId"],
-                direction=DIRECTION_BYBIT2VT[d["side"]],
+                direction=direction_map[d["side"]],
                 price=float(d["execPrice"]),
                 volume=float(d["execQty"]),
                 datetime=generate_datetime(int(d["execTime"])),
@@ -1158,36 +1244,32 @@ class BybitPrivateWebsocketApi(WebsocketClient):
 
     def on_order(self, packet: dict) -> None:
         """Callback of order update"""
+        type_map: MappingProxyType[str, OrderType] = ORDER_TYPE_BYBIT2VT
+        direction_map: MappingProxyType[str, Direction] = DIRECTION_BYBIT2VT
+        status_map: MappingProxyType[str, Status] = STATUS_BYBIT2VT
+
         for d in packet["data"]:
             order: OrderData = OrderData(
                 symbol=d["symbol"],
                 exchange=Exchange.BYBIT,
-                orderid=d["orderLinkId"],
-                type=ORDER_TYPE_BYBIT2VT[d["orderType"]],
-                direction=DIRECTION_BYBIT2VT[d["side"]],
+                orderid=d["orderLinkId"] or d["orderId"],
+                type=type_map[d["orderType"]],
+                direction=direction_map[d["side"]],
                 price=float(d["price"]),
                 volume=float(d["qty"]),
                 traded=float(d["cumExecQty"]),
-                status=STATUS_BYBIT2VT[d["orderStatus"]],
+                status=status_map[d["orderStatus"]],
+                offset=OFFSET_BYBIT2VT[d["reduceOnly"]],
                 datetime=generate_datetime(int(d["createdTime"])),
                 gateway_name=self.gateway_name
             )
 
-            if d["reduceOnly"]:
-                order.offset = Offset.CLOSE
-            else:
-                order.offset = Offset.OPEN
-
             self.gateway.on_order(order)
 
     def on_position(self, packet: dict) -> None:
         """Callback of holding position update"""
         for d in packet["data"]:
-            volume: float = 0
-            if d["side"] == "Buy":
-                volume = float(d["size"])
-            elif d["side"] == "Sell":
-                volume = -float(d["size"])
+            volume: float = SIDE_SIGN_BYBIT.get(d["side"], 0) * float(d["size"])
 
             position: PositionData = PositionData(
                 symbol=d["symbol"],
@@ -1205,52 +1287,64 @@ class BybitPrivateWebsocketApi(WebsocketClient):
 
 
 def generate_signature(secret: str, param_str: str) -> str:
-    """Generate signature for REST API"""
-    hash: hmac.HMAC = hmac.new(
-        bytes(secret, "utf-8"),
-        param_str.encode("utf-8"),
-        hashlib.sha256,
-    )
-    return hash.hexdigest()
+    """Generate HMAC-SHA256 signature"""
+    digest: bytes = hmac.digest(secret.encode("utf-8"), param_str.encode("utf-8"), "sha256")
+    return digest.hex()
 
 
+@lru_cache(maxsize=4096)
 def generate_datetime(timestamp: int) -> datetime:
     """Generate datetime object from timestamp"""
-    dt: datetime = datetime.fromtimestamp(timestamp / 1000)
-    return dt.replace(tzinfo=BYBIT_TZ)
+    dt: datetime = datetime.fromtimestamp(timestamp / 1000, BYBIT_TZ)
+    return dt
+
+
+def get_float_value(data: dict, key: str) -> float:
+    """Get float value from data, empty or missing field is treated as zero"""
+    value: str = data.get(key)
+    if not value:
+        return 0.0
+    return float(value)
+
+
+def clone_tick(tick: TickData) -> TickData:
+    """Create a shallow copy of tick data without generic copy protocol"""
+    new_tick: TickData = TickData.__new__(TickData)
+    new_tick.__dict__.update(tick.__dict__)
+    return new_tick
+
+
+def update_book(levels: dict[float, float], prices: list[float], data: list) -> None:
+    """Apply price level updates to local order book, zero size means deletion"""
+    for price_str, volume_str in data:
+        price: float = float(price_str)
+        volume: float = float(volume_str)
+
+        if volume:
+            if price not in levels:
+                insort(prices, price)
+            levels[price] = volume
+        elif price in levels:
+            del levels[price]
+            prices.pop(bisect_left(prices, price))
 
 
 def prepare_payload(method: str, parameters: dict) -> str:
     """
     Prepares the request payload and validates parameter value types.
     """
-
-    def cast_values():
-        string_params = [
-            "qty",
-            "price",
-            "triggerPrice",
-            "takeProfit",
-            "stopLoss",
-        ]
-        integer_params = ["positionIdx"]
+    if method == "GET":
+        payload = urlencode(sorted(
+            (k, v) for k, v in parameters.items() if v is not None
+        ))
+        return payload
+    else:
         for key, value in parameters.items():
-            if key in string_params:
+            if key in STRING_PARAMS:
                 if not isinstance(value, str):
                     parameters[key] = str(value)
-            elif key in integer_params:
+            elif key in INTEGER_PARAMS:
                 if not isinstance(value, int):
                     parameters[key] = int(value)
 
-    if method == "GET":
-        payload = "&".join(
-            [
-                str(k) + "=" + str(v)
-                for k, v in sorted(parameters.items())
-                if v is not None
-            ]
-        )
-        return payload
-    else:
-        cast_values()
-        return json.dumps(parameters)
+        return orjson.dumps(parameters).decode()